@@ -1,7 +1,8 @@
 #!/usr/bin/env python
 import argparse
 import os
-import json
+import orjson
+from pathlib import Path
 from migration_agent import MigrationAgent
 
 def main():
@@ -26,8 +27,9 @@ def main():
         analysis_result = agent.analyze_maven_project(args.path)
         
         # Print analysis summary
+        analysis = None
         try:
-            analysis = json.loads(analysis_result)
+            analysis = orjson.loads(analysis_result)
             print("\nAnalysis Summary:")
             print(f"Java Version: {analysis['jdk_version_used']}")
             print(f"Spring Boot Version: {analysis['spring_boot_parent_version_used']}")
@@ -43,18 +45,18 @@ def main():
                 # Generate migration plan
                 print("\nGenerating migration plan...")
                 migration_plan = agent.generate_migration_plan()
-                analysis = json.loads(migration_plan)
+                analysis["migration_plan"] = orjson.loads(migration_plan)
         except:
             print(analysis_result)
         
         # Save to file if output path is provided
         if args.output:
             try:
-                with open(args.output, 'w') as f:
-                    if isinstance(analysis_result, str):
-                        f.write(analysis_result)
-                    else:
-                        json.dump(analysis_result, f, indent=2)
+                # Write the parsed analysis, with the migration plan added under "migration_plan", in one go
+                if analysis is not None:
+                    Path(args.output).write_bytes(orjson.dumps(analysis, option=orjson.OPT_INDENT_2))
+                else:
+                    Path(args.output).write_text(analysis_result)
                 print(f"\nAnalysis saved to: {args.output}")
             except Exception as e:
                 print(f"Error saving analysis: {str(e)}")
@@ -1,32 +1,38 @@
 import os
 import asyncio
-import json
+import functools
 import logging
-from datetime import datetime
+import random
+import re
+import signal
+import sys
+import threading
+import orjson
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Optional
 from dotenv import load_dotenv
 from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 import google.generativeai as genai
-import win32api
-import win32con
+from google.api_core import exceptions as google_exceptions
 import ast
+from llm_cache import LLMResponseCache
+from llm_executor import run_llm
+from logging_setup import configure
 
-# Configure logging
-log_dir = "logs"
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-
-log_file = os.path.join(log_dir, f"java_migration_client_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# FUNCTION_CALL: function_name|param1=value1|param2=value2|...  or  FINAL_ANSWER: message
+# Searched line by line so preamble lines before the decision are skipped; a function
+# call ends at its line break while a final answer runs to the end of the response
+LLM_RESPONSE_RE = re.compile(
+    r"^[ \t]*(?:FUNCTION_CALL:[ \t]*(?P<name>[^|\n]+?)[ \t]*(?:\|(?P<params>[^\n]*))?|FINAL_ANSWER:\s*(?P<answer>.*))$",
+    re.MULTILINE | re.DOTALL
+)
+# A complete FUNCTION_CALL line anywhere in a partially streamed response
+FUNCTION_CALL_LINE_RE = re.compile(r"^[ \t]*FUNCTION_CALL:[^\n]*\n", re.MULTILINE)
+
 def parse_function_call_params(param_parts: list[str]) -> dict:
     """
     Parses key=value parts from the FUNCTION_CALL format.
@@ -34,12 +40,13 @@ def parse_function_call_params(param_parts: list[str]) -> dict:
     Returns a nested dictionary.
     """
     result = {}
-    logger.info(f"Param parts: {param_parts}")
+    logger.info("Param parts: %s", param_parts)
     for part in param_parts:
         if "=" not in part:
             raise ValueError(f"Invalid parameter format (expected key=value): {part}")
 
         key, value = part.split("=", 1)
+        key = key.strip()
 
         # Try to parse as Python literal (int, float, list, etc.)
         try:
@@ -47,259 +54,697 @@ def parse_function_call_params(param_parts: list[str]) -> dict:
         except Exception:
             parsed_value = value.strip()
 
+        # Tool parameters are normally flat, so only walk dotted keys
+        if "." not in key:
+            result[key] = parsed_value
+            continue
+
         # Support nested keys like input.string
         keys = key.split(".")
         current = result
         for k in keys[:-1]:
             current = current.setdefault(k, {})
         current[keys[-1]] = parsed_value
-    logger.info(f"Result: {result}")
+    logger.info("Result: %s", result)
     return result
 
+@dataclass
+class ToolResult:
+    """Text returned by an MCP tool call and its decoded JSON payload, if any."""
+    text: str
+    payload: Optional[dict] = None
+    # Set when the MCP server flagged the call itself as failed
+    is_error: bool = False
+
+    @property
+    def failed(self) -> bool:
+        """Whether the call errored or the tool reported success: false."""
+        return self.is_error or (self.payload is not None and not self.payload.get("success", True))
+
+def to_tool_result(result: types.CallToolResult) -> ToolResult:
+    """
+    Decodes the text content of an MCP tool result once.
+    The MCP servers return their dict results as JSON text, so callers can read
+    fields from payload instead of searching the raw text.
+    """
+    text = result.content[0].text
+    is_error = bool(getattr(result, "isError", False))
+    # Plain-text results (e.g. error messages) can't hold a dict, so skip the decode attempt
+    if not text.lstrip().startswith('{'):
+        return ToolResult(text=text, is_error=is_error)
+    try:
+        payload = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        payload = None
+    return ToolResult(text=text, payload=payload, is_error=is_error)
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Access your API key and initialize Gemini client correctly
-api_key = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=api_key)
+MODEL_NAME = 'gemini-2.0-flash'
+
+@functools.lru_cache(maxsize=1)
+def get_model() -> genai.GenerativeModel:
+    """Configures Gemini on first use and returns the shared model instance."""
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel(MODEL_NAME)
+
+@dataclass(frozen=True)
+class TimeoutConfig:
+    """
+    Escalating per-attempt timeouts for a Gemini call.
+    A tight first deadline cuts off tail-latency stragglers; each retry gets a
+    longer one, after a jittered exponential backoff.
+    """
+    attempt_timeouts: tuple[float, ...] = (8, 20, 45)
+    backoff_base: float = 0.25
+    backoff_jitter: float = 0.25
 
-# Initialize the model
-model = genai.GenerativeModel('gemini-2.0-flash')
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait before retrying after the given failed attempt."""
+        return self.backoff_base * 2 ** attempt + random.random() * self.backoff_jitter
+
+LLM_TIMEOUTS = TimeoutConfig()
+# Errors worth retrying: timeouts and rate limiting / overload
+TRANSIENT_LLM_ERRORS = (
+    asyncio.TimeoutError,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable
+)
+
+# Responses for prompts that were already answered, shared across runs.
+# Bump PROMPT_VERSION when the prompt templates or response parsing change so
+# responses given for the old prompts are no longer replayed.
+PROMPT_VERSION = "1"
+llm_cache = LLMResponseCache()
+
+def log_token_usage(response) -> None:
+    """Logs how many prompt tokens Gemini served from its implicit prefix cache."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        logger.info(
+            "LLM prompt tokens: %s, cached: %s",
+            usage.prompt_token_count,
+            # Only reported by SDK/API versions with context caching; logging must never fail a call
+            getattr(usage, "cached_content_token_count", None)
+        )
+
+def generate_text(prompt: str, generation_config: Optional[dict] = None, request_options: Optional[dict] = None) -> str:
+    """Blocking Gemini call returning the full response text."""
+    response = get_model().generate_content(
+        prompt,
+        generation_config=generation_config,
+        request_options=request_options
+    )
+    log_token_usage(response)
+    return response.text
+
+def cancel_stream(response) -> None:
+    """
+    Cancel the HTTP/gRPC stream behind a streamed Gemini response so an early return
+    does not leave it open until garbage collection. The SDK has no public close, so
+    this uses the underlying iterator's cancel(); cancelling a finished stream is a no-op.
+    """
+    cancel = getattr(getattr(response, "_iterator", None), "cancel", None)
+    if cancel is None:
+        return
+    try:
+        cancel()
+    except Exception as e:
+        logger.debug("Could not cancel LLM stream: %r", e)
+
+def stream_until_function_call(prompt: str, generation_config: Optional[dict] = None, request_options: Optional[dict] = None) -> str:
+    """
+    Blocking streamed Gemini call that stops reading once a complete FUNCTION_CALL
+    line has arrived, so trailing text after the call is never waited for.
+    Returns the text up to the end of that line, or the whole response if there is none.
+    """
+    parts = []
+    response = get_model().generate_content(
+        prompt,
+        generation_config=generation_config,
+        request_options=request_options,
+        stream=True
+    )
+    chunk = None
+    try:
+        for chunk in response:
+            parts.append(chunk.text)
+            if "\n" not in chunk.text:
+                continue
+            text = "".join(parts)
+            function_call = FUNCTION_CALL_LINE_RE.search(text)
+            if function_call:
+                logger.info("Stopped LLM stream after the function call line")
+                log_token_usage(chunk)
+                return text[:function_call.end()]
+    finally:
+        cancel_stream(response)
+    log_token_usage(chunk)
+    return "".join(parts)
+
+async def generate_with_timeout(prompt, timeouts: TimeoutConfig = LLM_TIMEOUTS, generation_config: Optional[dict] = None, stream: bool = False, cacheable: bool = True) -> str:
+    """
+    Generate content with a timeout and return the response text.
+    With stream=True the response is streamed and cut off after its FUNCTION_CALL line.
+    Pass cacheable=False for prompts whose answer must not be replayed from the cache.
+    Fresh responses are not cached here: callers store a response with
+    cache_llm_response once they have checked it is usable.
+    Timeouts and rate-limit errors are retried with the escalating deadlines of
+    timeouts; other errors are raised immediately.
+    """
+    if cacheable:
+        cached = llm_cache.get(prompt, MODEL_NAME, PROMPT_VERSION)
+        if cached is not None:
+            logger.info("LLM response served from cache")
+            return cached
 
-async def generate_with_timeout(prompt, timeout=10):
-    """Generate content with a timeout"""
     logger.info("Starting LLM generation...")
     
     try:
-        # Convert the synchronous generate_content call to run in a thread
-        loop = asyncio.get_event_loop()
-        response = await asyncio.wait_for(
-            loop.run_in_executor(
-                None, 
-                lambda: model.generate_content(prompt)
-            ),
-            timeout=timeout
-        )
+        last_attempt = len(timeouts.attempt_timeouts) - 1
+        for attempt, timeout in enumerate(timeouts.attempt_timeouts):
+            generate = functools.partial(
+                stream_until_function_call if stream else generate_text,
+                prompt,
+                generation_config,
+                # Give the HTTP request its own deadline so a timed-out call frees its
+                # worker thread instead of running on after wait_for gives up
+                {"timeout": timeout}
+            )
+            try:
+                # Run the synchronous generate_content call on the shared Gemini pool
+                response_text = await asyncio.wait_for(
+                    run_llm(generate),
+                    timeout=timeout
+                )
+                break
+            except TRANSIENT_LLM_ERRORS as e:
+                if attempt == last_attempt:
+                    raise
+                delay = timeouts.backoff(attempt)
+                logger.warning("LLM generation attempt %d failed (%r), retrying in %.1fs", attempt + 1, e, delay)
+                await asyncio.sleep(delay)
         logger.info("LLM generation completed")
-        logger.info(f"LLM Response:\n{response.text}")
-        return response
+        logger.debug("Raw LLM response:\n%s", response_text)
+        return response_text
     except Exception as e:
-        logger.error(f"Error in LLM generation: {e}")
+        logger.error("Error in LLM generation: %r", e)
         raise
 
-async def main():
-    logger.info("Starting main execution...")
+async def cache_llm_response(prompt: str, response_text: str):
+    """Store a validated LLM response so the same prompt is answered from the cache."""
+    llm_cache.put(prompt, response_text, MODEL_NAME, PROMPT_VERSION)
+    # Persist off the event loop thread; a failed write only costs future hits
     try:
-        # Create server connections for Maven and Moderne
-        logger.info("Establishing connections to MCP servers...")
-        moderne_mcp_server_params = StdioServerParameters(
-            command="python",
-            args=["moderne_mcp_server.py"]
-        )
+        await asyncio.get_running_loop().run_in_executor(None, llm_cache.save)
+    except OSError as e:
+        logger.warning("Could not persist LLM cache: %s", e)
 
-        maven_mcp_server_params = StdioServerParameters(
-            command="python",
-            args=["maven_op.py"]
-        )
+def format_tool(tool: types.Tool) -> str:
+    """Describe a tool as a compact 'name(param: type, ...) - description' line."""
+    props = tool.inputSchema.get('properties')
+    if props:
+        params_str = ', '.join(f"{name}: {info.get('type', 'unknown')}" for name, info in props.items())
+    else:
+        params_str = 'no parameters'
+    return f"{tool.name}({params_str}) - {tool.description or 'No description available'}"
 
-        async with stdio_client(moderne_mcp_server_params) as (moderne_read, moderne_write), \
-                stdio_client(maven_mcp_server_params) as (maven_read, maven_write):
-            
-            logger.info("Connections established, creating sessions...")
-            async with ClientSession(moderne_read, moderne_write) as moderne_session, \
-                    ClientSession(maven_read, maven_write) as maven_session:
-                
-                logger.info("Sessions created, initializing...")
-                await moderne_session.initialize()
-                await maven_session.initialize()
-                
-                # Get available tools from all servers
-                logger.info("Requesting tool lists...")
-                moderne_tools_result = await moderne_session.list_tools()
-                maven_tools_result = await maven_session.list_tools()
-                
-                moderne_tools = moderne_tools_result.tools
-                maven_tools = maven_tools_result.tools
-                
-                logger.info(f"Successfully retrieved {len(moderne_tools)} Moderne MCP tools")
-                logger.info(f"Successfully retrieved {len(maven_tools)} Maven MCP tools")   
-
-
-                # Create system prompt with available tools
-                logger.info("Creating system prompt...")
-                
-                tools_description = []
-                
-                # Add Moderne tools
-                tools_description.append("Moderne TOOLS:")
-                for i, tool in enumerate(moderne_tools):
-                    try:
-                        params = tool.inputSchema
-                        desc = getattr(tool, 'description', 'No description available')
-                        name = getattr(tool, 'name', f'tool_{i}')
-                        
-                        if 'properties' in params:
-                            param_details = []
-                            for param_name, param_info in params['properties'].items():
-                                param_type = param_info.get('type', 'unknown')
-                                param_details.append(f"{param_name}: {param_type}")
-                            params_str = ', '.join(param_details)
-                        else:
-                            params_str = 'no parameters'
-
-                        tool_desc = f"{i+1}. {name}({params_str}) - {desc}"
-                        tools_description.append(tool_desc)
-                        logger.info(f"Added description for Math tool: {tool_desc}")
-                    except Exception as e:
-                        logger.error(f"Error processing Math tool {i}: {e}")
-                        tools_description.append(f"{i+1}. Error processing tool")
-
-                # Add Maven tools
-                tools_description.append("\nMAVEN TOOLS:")
-                for i, tool in enumerate(maven_tools):
-                    try:
-                        params = tool.inputSchema
-                        desc = getattr(tool, 'description', 'No description available')
-                        name = getattr(tool, 'name', f'tool_{i}')
-                        
-                        if 'properties' in params:
-                            param_details = []
-                            for param_name, param_info in params['properties'].items():
-                                param_type = param_info.get('type', 'unknown')
-                                param_details.append(f"{param_name}: {param_type}")
-                            params_str = ', '.join(param_details)
-                        else:
-                            params_str = 'no parameters'
-
-                        tool_desc = f"{i+1}. {name}({params_str}) - {desc}"
-                        tools_description.append(tool_desc)
-                        logger.info(f"Added description for Maven tool: {tool_desc}")
-                    except Exception as e:
-                        logger.error(f"Error processing Maven tool {i}: {e}")
-                        tools_description.append(f"{i+1}. Error processing tool")
-
-                tools_description = "\n".join(tools_description)
-                logger.info("Successfully created tools description")
-
-                print("Java/Maven Migration Agent initialized. Type 'exit' to quit.")
-                
-                system_prompt = f"""You are an java migration assistant that can perform pom file analysis operation.
+def format_tools_description(moderne_tools: list[types.Tool], maven_tools: list[types.Tool]) -> str:
+    """Describe the Moderne and Maven tools, one line per tool under a header for each server."""
+    return "\n".join([
+        "Moderne tools:",
+        *map(format_tool, moderne_tools),
+        "Maven tools:",
+        *map(format_tool, maven_tools)
+    ])
+
+SYSTEM_PROMPT_TEMPLATE = """You are a Java migration assistant that analyzes Maven pom files and runs Moderne migrations.
+
+Available tools:
+{tools_description}
+
+Reply with EXACTLY ONE line in one of these formats:
+FUNCTION_CALL: toolName|param1=value1|param2=value2
+FINAL_ANSWER: [your response]
+
+Examples:
+FUNCTION_CALL: analyzeProject
+FUNCTION_CALL: modUpgradeAll|recipe_id=UpgradeSpringBoot_3_2"""
+
+@functools.lru_cache(maxsize=8)
+def build_system_prompt(tools_description: str) -> str:
+    """
+    Build the system prompt for the given tools description.
+    Cached so reconnecting to servers exposing the same tools reuses the prompt.
+    """
+    return SYSTEM_PROMPT_TEMPLATE.format_map({"tools_description": tools_description})
+
+PLANNER_PROMPT_TEMPLATE = """You are a Java migration assistant that analyzes Maven pom files and runs Moderne migrations.
 
 Available tools:
 {tools_description}
 
-Respond with EXACTLY ONE of these formats:
-1. For function calls (using key=value format):
-   FUNCTION_CALL: function_name|param1=value1|param2=value2|...
-   The parameters must match the required input types for the function.
-   
-   Example: for analyzeProject(), use:
-   FUNCTION_CALL: analyzeProject
-
-   Example: for migrationPlan(), use:
-   FUNCTION_CALL: migrationPlan
-
-   Example: For mod_build_all(), use:
-   FUNCTION_CALL: mod_build_all
-
-   Example: For mod_upgrade_all(recipe_id: str), use:
-   FUNCTION_CALL: mod_upgrade_all|recipe_id=UpgradeSpringBoot_3_2
-   
-   Example: For mod_apply_upgrade_all(), use:
-   FUNCTION_CALL: mod_apply_upgrade_all
-
-2. For final answers:
-   FINAL_ANSWER: [your response]
-
-DO NOT include multiple responses. Give ONE response at a time.
-Make sure to provide parameters in the correct order as specified in the function signature."""
-
-                # Initial query for math operation
-                projects_base_path = os.getenv("PROJECTS_BASE_PATH")
-                query = f"Perform an analysis of the projects. Then send spring_boot_version to decide the migration plan. Then perform mod_build_all. Then perform mod_upgrade_all by passing the recipe_id. Then perform mod_apply_upgrade_all."
-
-                logger.info(f"Starting with query: {query}")
-                
-                # Use global iteration variables
-                iteration = 0
-                max_iterations = 4
-                last_response = None
-                iteration_response = []
-                
-                while iteration < max_iterations:
-                    logger.info(f"\n--- Iteration {iteration + 1} ---")
-                    if last_response is None:
-                        current_query = query
-                    else:
-                        current_query = current_query + "\n\n" + " ".join(iteration_response)
-                        current_query = current_query + "  What should I do next?"
-                        logger.info(f"Updated query: {current_query}")
-
-                    # Get model's response with timeout
-                    logger.info("Preparing to generate LLM response...")
-                    prompt = f"{system_prompt}\n\nQuery: {current_query}"
-                    try:
-                        response = await generate_with_timeout(prompt)
-                        response_text = response.text.strip()
-                        logger.info(f"LLM Response: {response_text}")
-                    except Exception as e:
-                        logger.error(f"Failed to get LLM response: {e}")
-                        break
-                    logger.info(f"IM HERE BEFORE CHECKING FUNCTIONS: {response_text.startswith("FUNCTION_CALL:")}")
-                    if response_text.startswith("FUNCTION_CALL:"):
-                        logger.info(f"Function call detected: {response_text}")
-                        _, function_info = response_text.split(":", 1)
-                        parts = [p.strip() for p in function_info.split("|")]
-                        func_name, params = parts[0], parts[1:]
-                        length = len(params)
-                        logger.info(f"Length of params: {length}")
-                        logger.info(f"Calling function {func_name} with params {params}")
-                        logger.info(f"Calling function parse_function_call_params with params {params}")
-                        arguments = parse_function_call_params(params)
-                        logger.info(f"Final arguments: {arguments}")
-                        logger.info(f"Calling tool {func_name}")
-                        try:
-                            # Determine which session to use based on the function name
-                            if func_name in [tool.name for tool in moderne_tools]:
-                                if length == 0:
-                                    result = await moderne_session.call_tool(func_name)
-                                else:
-                                    result = await moderne_session.call_tool(func_name, arguments=arguments)
-                            elif func_name in [tool.name for tool in maven_tools]:
-                                if length == 0:
-                                    result = await maven_session.call_tool(func_name)
-                                else:
-                                    result = await maven_session.call_tool(func_name, arguments=arguments)
-                            else:
-                                logger.error(f"Unknown function: {func_name}")
-                                continue
-                            
-                            logger.info(f"Function call result: {result}")
-                            last_response = result
-                            iteration_response.append(result.content[0].text)
-                            
-                        except Exception as e:
-                            logger.error(f"Error calling function {func_name}: {e}")
-                            iteration_response.append(f"Error: {str(e)}")
-                    
-                    elif response_text.startswith("FINAL_ANSWER:"):
-                        logger.info("Received final answer")
-                        last_response = response_text
-                        iteration_response.append(response_text)
-                        break
-                    
-                    iteration += 1
-                    
-                    # Break if we've completed all steps
-                    # if math_result and email_sent:
-                    #     break
-                
-                logger.info("Workflow completed")
-                logger.info(f"Final responses: {iteration_response}")
-                
+Plan ALL the tool calls needed to complete the query, in the order they must run.
+Give each step the tool name and its parameters as key/value pairs; leave params empty for tools without parameters.
+Use only the tool names listed above.
+The recipe_id chosen by migrationPlan is passed to modUpgradeAll automatically, so do not invent one."""
+
+@functools.lru_cache(maxsize=8)
+def build_planner_prompt(tools_description: str) -> str:
+    """Build the prompt asking for the whole workflow as one JSON plan."""
+    return PLANNER_PROMPT_TEMPLATE.format_map({"tools_description": tools_description})
+
+# Gemini constrains the planner's reply to this schema. Tool parameters are
+# key/value pairs because a response schema cannot describe a free-form object.
+PLAN_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "steps": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "params": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "key": {"type": "string"},
+                                "value": {"type": "string"}
+                            },
+                            "required": ["key", "value"]
+                        }
+                    }
+                },
+                "required": ["name"]
+            }
+        }
+    },
+    "required": ["steps"]
+}
+
+async def plan_workflow(tools_description: str, query: str, tool_sessions: dict) -> Optional[list[tuple[str, dict]]]:
+    """
+    Ask the LLM for every tool call of the workflow in a single request.
+    Returns (tool name, arguments) pairs, or None when the plan is unusable and
+    the caller should fall back to deciding one step per LLM call.
+    """
+    prompt = f"{build_planner_prompt(tools_description)}\n\nQuery: {query}"
+    try:
+        # A replayed plan would re-run modUpgradeAll/modApplyUpgradeAll against a project
+        # that may have changed since, so plans are always generated fresh
+        response_text = await generate_with_timeout(
+            prompt,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": PLAN_RESPONSE_SCHEMA
+            },
+            cacheable=False
+        )
+        steps = [
+            (step["name"], {param["key"]: param["value"] for param in step.get("params", [])})
+            for step in orjson.loads(response_text)["steps"]
+        ]
     except Exception as e:
-        logger.error(f"Error in main execution: {e}")
+        logger.warning("Could not get a workflow plan, deciding step by step: %s", e)
+        return None
+
+    if not steps:
+        logger.warning("Workflow plan has no steps, deciding step by step")
+        return None
+    unknown = [name for name, _ in steps if name not in tool_sessions]
+    if unknown:
+        logger.warning("Workflow plan uses unknown tools %s, deciding step by step", unknown)
+        return None
+    logger.info("Workflow plan: %s", [name for name, _ in steps])
+    return steps
+
+async def execute_tool_call(tool_sessions: dict, func_name: str, arguments: dict, recipe_id: Optional[str]) -> tuple[ToolResult, Optional[str]]:
+    """
+    Call a tool on the MCP session serving it.
+    Passes the recipe selected by migrationPlan on to modUpgradeAll and returns
+    the decoded tool result together with the (possibly updated) recipe id.
+    """
+    # A recipe_id written by the LLM (in a plan made before migrationPlan ran, or in a
+    # step decision) is a guess; the recipe migrationPlan actually selected wins
+    if func_name == "modUpgradeAll" and recipe_id:
+        arguments = {**arguments, "recipe_id": recipe_id}
+    logger.info("Final arguments: %s", arguments)
+    logger.info("Calling tool %s", func_name)
+    server, session = tool_sessions[func_name]
+    logger.info("Using %s session for %s", server, func_name)
+    if not arguments:
+        result = await session.call_tool(func_name)
+    else:
+        result = await session.call_tool(func_name, arguments=arguments)
+
+    logger.debug("Function call result: %s", result)
+    tool_result = to_tool_result(result)
+    if tool_result.failed:
+        logger.warning("Tool %s reported failure: %s", func_name, (tool_result.payload or {}).get('error', tool_result.text))
+    elif func_name == "migrationPlan" and tool_result.payload is not None:
+        recipe_id = tool_result.payload.get("recipe", {}).get("recipe_id") or recipe_id
+        logger.info("Recipe selected by migrationPlan: %s", recipe_id)
+    return tool_result, recipe_id
+
+MODERNE_MCP_SERVER_PARAMS = StdioServerParameters(
+    command="python",
+    args=["moderne_mcp_server.py"]
+)
+
+MAVEN_MCP_SERVER_PARAMS = StdioServerParameters(
+    command="python",
+    args=["maven_op.py"]
+)
+
+# Number of most recent tool results passed back to the LLM on each iteration
+MAX_CONTEXT_RESPONSES = 4
+
+# Fixed order of the migration workflow; when DEFAULT_QUERY asks for all of it, each
+# step's successor needs no LLM decision
+WORKFLOW_STEPS = ("analyzeProject", "migrationPlan", "modBuildAll", "modUpgradeAll", "modApplyUpgradeAll")
+NEXT_WORKFLOW_STEP = dict(zip(WORKFLOW_STEPS, WORKFLOW_STEPS[1:]))
+
+def next_workflow_step(func_name: str, recipe_id: Optional[str], tool_sessions: dict) -> Optional[str]:
+    """
+    Return the tool that follows func_name in the workflow when it can run without
+    the LLM, or None when the LLM should decide (end of the workflow, a tool that is
+    not available, or modUpgradeAll without a recipe from migrationPlan).
+    """
+    next_step = NEXT_WORKFLOW_STEP.get(func_name)
+    if next_step not in tool_sessions:
+        return None
+    if next_step == "modUpgradeAll" and not recipe_id:
+        return None
+    return next_step
+
+class MCPConnections:
+    """
+    Owns the stdio connections and sessions to the Moderne and Maven MCP servers.
+    Connect once and hand the instance to run_migration so the server subprocesses
+    and MCP handshakes are not repeated for every workflow run.
+    """
+
+    def __init__(self, moderne_params=MODERNE_MCP_SERVER_PARAMS, maven_params=MAVEN_MCP_SERVER_PARAMS):
+        self.moderne_params = moderne_params
+        self.maven_params = maven_params
+        self.moderne_session = None
+        self.maven_session = None
+        self.moderne_tools = []
+        self.maven_tools = []
+        # Derived from the tool lists once per connection and reused by every run
+        self.tools_description = ""
+        self.tool_sessions = {}
+        self._exit_stack = None
+
+    async def connect(self):
+        """Start both MCP servers, initialize their sessions and fetch their tool lists."""
+        if self._exit_stack is not None:
+            return
+        self._exit_stack = AsyncExitStack()
+        try:
+            logger.info("Establishing connections to MCP servers...")
+            moderne_read, moderne_write = await self._exit_stack.enter_async_context(stdio_client(self.moderne_params))
+            maven_read, maven_write = await self._exit_stack.enter_async_context(stdio_client(self.maven_params))
+
+            logger.info("Connections established, creating sessions...")
+            self.moderne_session = await self._exit_stack.enter_async_context(ClientSession(moderne_read, moderne_write))
+            self.maven_session = await self._exit_stack.enter_async_context(ClientSession(maven_read, maven_write))
+
+            logger.info("Sessions created, initializing...")
+            # The two servers are independent, so overlap their round-trips
+            await asyncio.gather(self.moderne_session.initialize(), self.maven_session.initialize())
+
+            # Get available tools from all servers
+            logger.info("Requesting tool lists...")
+            moderne_tools_result, maven_tools_result = await asyncio.gather(
+                self.moderne_session.list_tools(),
+                self.maven_session.list_tools()
+            )
+
+            self.moderne_tools = moderne_tools_result.tools
+            self.maven_tools = maven_tools_result.tools
+
+            logger.info("Successfully retrieved %d Moderne MCP tools", len(self.moderne_tools))
+            logger.info("Successfully retrieved %d Maven MCP tools", len(self.maven_tools))
+
+            self.tools_description = format_tools_description(self.moderne_tools, self.maven_tools)
+            # Map each tool name to the session serving it; Moderne wins on a name clash
+            self.tool_sessions = {tool.name: ("Maven", self.maven_session) for tool in self.maven_tools}
+            self.tool_sessions.update({tool.name: ("Moderne", self.moderne_session) for tool in self.moderne_tools})
+        except BaseException:
+            await self.disconnect()
+            raise
+
+    async def disconnect(self):
+        """Close both sessions and stop the MCP server subprocesses."""
+        if self._exit_stack is None:
+            return
+        exit_stack, self._exit_stack = self._exit_stack, None
+        self.moderne_session = None
+        self.maven_session = None
+        self.tool_sessions = {}
+        await exit_stack.aclose()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.disconnect()
+
+# Process-wide connections shared by every run in serve mode
+_connections: Optional[MCPConnections] = None
+
+async def get_connections() -> MCPConnections:
+    """Return the process-wide MCP connections, starting the servers on first use."""
+    global _connections
+    if _connections is None:
+        _connections = MCPConnections()
+    await _connections.connect()
+    return _connections
+
+async def shutdown_connections():
+    """Stop the process-wide MCP servers, if they were started."""
+    global _connections
+    if _connections is not None:
+        connections, _connections = _connections, None
+        await connections.disconnect()
+
+DEFAULT_QUERY = "Perform analyzeProject. Then perform migrationPlan. Then perform modBuildAll. Then perform modUpgradeAll with the recipe_id. Then perform modApplyUpgradeAll."
+
+async def run_migration(connections: MCPConnections, query: str = DEFAULT_QUERY):
+    """Run the analysis and migration workflow for a query over connected MCP sessions."""
+    tools_description = connections.tools_description
+    tool_sessions = connections.tool_sessions
+
+    # Create system prompt with available tools
+    logger.info("Creating system prompt...")
+    system_prompt = build_system_prompt(tools_description)
+
+    # Initial query for math operation
+    projects_base_path = os.getenv("PROJECTS_BASE_PATH")
+
+    logger.info("Starting with query: %s", query)
+    
+    iteration_response = []
+    # Recipe selected by migrationPlan, read from its decoded payload
+    recipe_id = None
+
+    # Try to get the whole workflow from a single LLM call first
+    steps = await plan_workflow(tools_description, query, tool_sessions)
+    if steps is not None:
+        for func_name, arguments in steps:
+            try:
+                tool_result, recipe_id = await execute_tool_call(tool_sessions, func_name, arguments, recipe_id)
+                iteration_response.append(tool_result.text)
+            except Exception as e:
+                logger.error("Error calling function %s: %s", func_name, e)
+                iteration_response.append(f"Error: {str(e)}")
+                break
+            # Later steps depend on earlier ones (e.g. modApplyUpgradeAll applies the last
+            # upgrade run), so a failed step ends the plan
+            if tool_result.failed:
+                logger.error("Stopping workflow plan after %s failed", func_name)
+                break
+        logger.info("Workflow completed")
+        logger.info("Final responses: %s", iteration_response)
+        return
+
+    # Use global iteration variables
+    iteration = 0
+    # Room for every workflow step plus the final answer
+    max_iterations = len(WORKFLOW_STEPS) + 1
+    # Tool that must run next after a successful workflow step; no LLM call is needed for it.
+    # Only the full-workflow query fixes the step order: any other query may ask for a
+    # subset (e.g. just analyzeProject), so the LLM decides every step and the run never
+    # drifts into the code-changing modUpgradeAll/modApplyUpgradeAll unasked
+    follow_workflow = query == DEFAULT_QUERY
+    next_step = None
+    # Once migrationPlan has run, the next decisions lead to the code-changing steps and
+    # are never replayed from the response cache
+    migration_planned = False
+    
+    while iteration < max_iterations:
+        logger.info("\n--- Iteration %s ---", iteration + 1)
+        if next_step is not None:
+            logger.info("Running next workflow step %s without asking the LLM", next_step)
+            func_name, arguments = next_step, {}
+        else:
+            if not iteration_response:
+                current_query = query
+            else:
+                # Only the most recent results are passed back, so the prompt stays bounded
+                current_query = "\n\n".join((
+                    query,
+                    *iteration_response[-MAX_CONTEXT_RESPONSES:],
+                    "What should I do next?"
+                ))
+                logger.info("Updated query: %s", current_query)
+
+            # Get model's response with timeout
+            logger.info("Preparing to generate LLM response...")
+            # Keep the invariant system prompt first so Gemini can reuse it as a cached prefix
+            prompt = f"{system_prompt}\n\nQuery: {current_query}"
+            try:
+                response_text = (await generate_with_timeout(prompt, stream=True, cacheable=not migration_planned)).strip()
+                logger.info("LLM Response: %s", response_text)
+            except Exception as e:
+                logger.error("Failed to get LLM response: %s", e)
+                break
+            parsed = LLM_RESPONSE_RE.search(response_text)
+            if not parsed:
+                logger.warning("Unrecognized LLM response: %s", response_text)
+                iteration += 1
+                continue
+            if parsed.group("name") is None:
+                logger.info("Received final answer")
+                if not migration_planned:
+                    await cache_llm_response(prompt, response_text)
+                iteration_response.append(response_text)
+                break
+
+            logger.info("Function call detected: %s", parsed.group(0))
+            func_name = parsed.group("name")
+            # Reject unknown tools before spending any work on their parameters
+            if func_name not in tool_sessions:
+                logger.error("Unknown function: %s", func_name)
+                iteration_response.append(f"Error: Unknown function {func_name}")
+                iteration += 1
+                continue
+            # Only cache decisions that name a real tool, so an unusable reply is asked for
+            # again on the next iteration instead of being replayed
+            if not migration_planned:
+                await cache_llm_response(prompt, response_text)
+            param_str = parsed.group("params")
+            params = [part for part in map(str.strip, param_str.split("|")) if part] if param_str else []
+            length = len(params)
+            logger.info("Length of params: %s", length)
+            logger.info("Calling function %s with params %s", func_name, params)
+            logger.info("Calling function parse_function_call_params with params %s", params)
+            arguments = parse_function_call_params(params)
+
+        next_step = None
+        if func_name == "migrationPlan":
+            migration_planned = True
+        try:
+            tool_result, recipe_id = await execute_tool_call(tool_sessions, func_name, arguments, recipe_id)
+            iteration_response.append(tool_result.text)
+            if follow_workflow and not tool_result.failed and tool_result.payload is not None and tool_result.payload.get("success"):
+                next_step = next_workflow_step(func_name, recipe_id, tool_sessions)
+        except Exception as e:
+            logger.error("Error calling function %s: %s", func_name, e)
+            iteration_response.append(f"Error: {str(e)}")
+        
+        iteration += 1
+    
+    logger.info("Workflow completed")
+    logger.info("Final responses: %s", iteration_response)
+
+async def serve(queries: asyncio.Queue):
+    """
+    Run a migration for every query put on the queue, reusing one pair of MCP
+    server connections, until None is received. On SIGTERM the migration in
+    progress finishes and queries still waiting on the queue are dropped.
+    """
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+
+    def request_stop():
+        stop.set()
+        # Wake the loop if it is idle waiting for the next query
+        queries.put_nowait(None)
+
+    try:
+        # Not supported by the Windows event loops; Ctrl+C still ends the process there
+        loop.add_signal_handler(signal.SIGTERM, request_stop)
+        handles_sigterm = True
+    except (NotImplementedError, RuntimeError):
+        handles_sigterm = False
+    try:
+        connections = await get_connections()
+        while True:
+            query = await queries.get()
+            try:
+                if query is None or stop.is_set():
+                    logger.info("Stopping serve mode")
+                    return
+                await run_migration(connections, query)
+            except Exception as e:
+                logger.error("Error running query %r: %s", query, e)
+            finally:
+                queries.task_done()
+    finally:
+        if handles_sigterm:
+            loop.remove_signal_handler(signal.SIGTERM)
+        await shutdown_connections()
+
+def read_queries(queries: asyncio.Queue):
+    """
+    Put each non-empty line from stdin on the queue, followed by None at end of input
+    or on 'exit'. Lines are read on a daemon thread so a pending read never delays shutdown.
+    """
+    loop = asyncio.get_running_loop()
+
+    def reader():
+        try:
+            for line in sys.stdin:
+                query = line.strip()
+                if query == "exit":
+                    break
+                if query:
+                    loop.call_soon_threadsafe(queries.put_nowait, query)
+            loop.call_soon_threadsafe(queries.put_nowait, None)
+        except RuntimeError:
+            # The event loop already closed, e.g. after SIGTERM
+            pass
+
+    threading.Thread(target=reader, name="query-reader", daemon=True).start()
+
+async def main():
+    logger.info("Starting main execution...")
+    print("Java/Maven Migration Agent initialized. Type 'exit' to quit.")
+    try:
+        if "--serve" in sys.argv[1:]:
+            queries = asyncio.Queue()
+            read_queries(queries)
+            await serve(queries)
+        else:
+            async with MCPConnections() as connections:
+                await run_migration(connections)
+    except Exception as e:
+        logger.error("Error in main execution: %s", e)
         raise
 
 if __name__ == "__main__":
+    configure()
+    # uvloop is optional (and unavailable on Windows); fall back to the default loop
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main()) 
\ No newline at end of file
@@ -0,0 +1,90 @@
+import hashlib
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# How long a cached response stays valid, in seconds
+DEFAULT_TTL_SECONDS = 3600
+
+
+class LLMResponseCache:
+    """
+    Exact-match cache of LLM response texts keyed by the SHA-256 of the model name,
+    prompt version and prompt.
+    Entries expire after ttl seconds. They are held in memory and persisted to a JSON
+    file between runs.
+    """
+
+    def __init__(self, path: str = os.path.join("logs", "llm_cache.json"), ttl: float = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        """Load unexpired entries from disk, starting empty if the file is missing or unreadable."""
+        try:
+            with open(self.path, 'rb') as f:
+                entries = orjson.loads(f.read())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable LLM cache %s: %s", self.path, e)
+            return {}
+        now = time.time()
+        entries = {
+            key: entry for key, entry in entries.items()
+            if isinstance(entry, dict) and entry.get("expires", 0) > now
+        }
+        logger.info("Loaded %d cached LLM responses from %s", len(entries), self.path)
+        return entries
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str = "", prompt_version: str = "") -> str:
+        """
+        Return the cache key for a prompt sent to a model.
+        Runs of whitespace are collapsed first so prompts that differ only in
+        formatting (e.g. how tool output was joined) share an entry. Bumping
+        prompt_version invalidates every entry made with an older version.
+        """
+        normalized = " ".join(prompt.split())
+        return hashlib.sha256(f"{model_name}|{prompt_version}|{normalized}".encode('utf-8')).hexdigest()
+
+    def get(self, prompt: str, model_name: str = "", prompt_version: str = "") -> Optional[str]:
+        """Return the cached response text for a prompt, or None on a miss or expired entry."""
+        key = self.make_key(prompt, model_name, prompt_version)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires"] <= time.time():
+            del self._entries[key]
+            return None
+        return entry["text"]
+
+    def put(self, prompt: str, response_text: str, model_name: str = "", prompt_version: str = "") -> None:
+        """Store the response text for a prompt in memory."""
+        self._entries[self.make_key(prompt, model_name, prompt_version)] = {
+            "text": response_text,
+            "expires": time.time() + self.ttl
+        }
+
+    def save(self) -> None:
+        """Write the cache to disk, replacing the previous file atomically."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        entries = dict(self._entries)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(entries))
+        os.replace(tmp_path, self.path)
+
+    def cache_clear(self) -> None:
+        """Drop all cached responses, e.g. after the tool schemas or prompt change."""
+        self._entries.clear()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
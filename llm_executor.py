@@ -0,0 +1,23 @@
+import asyncio
+import atexit
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from dotenv import load_dotenv
+
+T = TypeVar("T")
+
+# Load environment variables so LLM_POOL_SIZE can be set in .env
+load_dotenv()
+
+# Dedicated pool for blocking Gemini calls so they don't compete with other
+# users of the event loop's default executor; sized for concurrent LLM calls
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "8"))
+LLM_EXECUTOR = ThreadPoolExecutor(max_workers=LLM_POOL_SIZE, thread_name_prefix="gemini")
+atexit.register(LLM_EXECUTOR.shutdown, wait=False)
+
+
+async def run_llm(fn: Callable[..., T], *args: Any) -> T:
+    """Run a blocking LLM SDK call on the shared Gemini pool and await its result."""
+    return await asyncio.get_running_loop().run_in_executor(LLM_EXECUTOR, fn, *args)
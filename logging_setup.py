@@ -0,0 +1,136 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+_listener = None
+
+# Size of the write buffer for the log file
+LOG_BUFFER_SIZE = 64 * 1024
+# Rotate the log file once it reaches this size, keeping a few backups
+LOG_MAX_BYTES = 8 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler that writes through a large buffer instead of flushing each record.
+    Rollover is decided from a running count of encoded bytes, because checking the
+    file position would flush the buffer. The buffer is flushed by IdleFlushQueueListener
+    whenever the queue drains.
+    """
+
+    def _open(self):
+        stream = open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE, encoding=self.encoding, errors=self.errors)
+        self.bytes_written = os.path.getsize(self.baseFilename)
+        return stream
+
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+            # maxBytes is a byte limit, and non-ASCII text (LLM output, paths) takes several bytes per character
+            msg_bytes = len(msg.encode(self.encoding or "utf-8", self.errors or "strict"))
+            if self.stream is None:
+                self.stream = self._open()
+            if 0 < self.maxBytes <= self.bytes_written + msg_bytes and self.bytes_written > 0:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self.bytes_written += msg_bytes
+        except Exception:
+            self.handleError(record)
+
+
+class IdleFlushQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes its handlers before blocking on an empty queue."""
+
+    def dequeue(self, block):
+        if block and self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+        return self.queue.get(block)
+
+
+def configure(name: str = "java_migration_client", log_dir: str = "logs") -> Optional[logging.handlers.QueueListener]:
+    """
+    Configure root logging for the migration client.
+
+    Records are put on an in-memory queue by a QueueHandler and written to the
+    log file and console by a QueueListener running on a background thread, so
+    logging from the asyncio event loop never blocks on disk or terminal I/O.
+    Repeated calls return the listener created by the first call, and nothing is
+    added (None is returned) if the root logger was already configured elsewhere.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    if logging.getLogger().handlers:
+        return None
+
+    Path(log_dir).mkdir(parents=True, exist_ok=True)
+
+    log_file = os.path.join(log_dir, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+    log_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+    file_handler = BufferedRotatingFileHandler(
+        log_file,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding='utf-8',
+        delay=True
+    )
+    file_handler.setFormatter(log_format)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(log_format)
+
+    log_queue = queue.Queue(-1)
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _listener = IdleFlushQueueListener(
+        log_queue,
+        file_handler,
+        console_handler,
+        respect_handler_level=True
+    )
+    _listener.start()
+    # Drain any queued records and flush the file buffer before the interpreter exits
+    atexit.register(file_handler.close)
+    atexit.register(_listener.stop)
+    return _listener
+
+
+SERVER_LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
+SERVER_LOG_MAX_BYTES = 10 * 1024 * 1024
+
+
+def configure_server_logger(name: str, log_file: str) -> logging.Logger:
+    """
+    Return the named DEBUG logger used by an MCP server module.
+
+    Records go to stdout and to a rotating log_file. Existing handlers on the
+    logger are replaced, so importing a module twice does not duplicate output.
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+
+    log_format = logging.Formatter(SERVER_LOG_FORMAT)
+    console_handler = logging.StreamHandler(sys.stdout)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file,
+        maxBytes=SERVER_LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT
+    )
+    for handler in (console_handler, file_handler):
+        handler.setFormatter(log_format)
+        logger.addHandler(handler)
+    return logger
@@ -1,15 +1,19 @@
 from mcp.server.fastmcp import FastMCP
-import logging
-import logging.handlers
-import sys
 import os
+import atexit
+import functools
 import json
-import xml.etree.ElementTree as ET
-from typing import List, Dict, Optional, Any, Union
+import mmap
+import orjson
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree as ET
+from typing import List, Dict, Optional, Any, Tuple, Union
 import google.generativeai as genai
 from google.generativeai import GenerativeModel
 from dotenv import load_dotenv
 from pydantic import BaseModel
+from logging_setup import configure_server_logger
 
 class ProjectDetails(BaseModel):
     success: bool
@@ -44,32 +48,7 @@ class MigrationPlanArgs(BaseModel):
 load_dotenv()
 
 # Configure detailed logging
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-
-# Remove any existing handlers to avoid duplicate logs
-for handler in logger.handlers[:]:
-    logger.removeHandler(handler)
-
-# Create handlers
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.DEBUG)
-
-file_handler = logging.handlers.RotatingFileHandler(
-    'maven_op.log',
-    maxBytes=10485760,  # 10MB
-    backupCount=5
-)
-file_handler.setLevel(logging.DEBUG)
-
-# Create formatters and add it to handlers
-log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s')
-console_handler.setFormatter(log_format)
-file_handler.setFormatter(log_format)
-
-# Add handlers to the logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+logger = configure_server_logger(__name__, 'maven_op.log')
 
 # Initialize FastMCP with debug logging
 logger.info("Initializing Maven Operation MCP Server")
@@ -80,6 +59,10 @@ logger.info("FastMCP instance created")
 PROJECTS_BASE_PATH = os.getenv('PROJECTS_BASE_PATH')
 logger.info(f"Projects base path: {PROJECTS_BASE_PATH}")
 
+# Moderne recipe catalog used by migrationPlan; defaults to moderne_recipes.json in the home directory
+MODERNE_RECIPES_PATH = os.getenv('MODERNE_RECIPES_PATH', os.path.join(os.path.expanduser("~"), "moderne_recipes.json"))
+logger.info(f"Moderne recipes path: {MODERNE_RECIPES_PATH}")
+
 def get_full_project_path(project_name: str) -> str:
     """Get the full project path from the project name."""
     if not PROJECTS_BASE_PATH:
@@ -98,7 +81,7 @@ def serialize_response(response: Dict[str, Any]) -> Dict[str, Any]:
         Dict containing serialized response
     """
     try:
-        logger.debug(f"Serializing response: {response}")
+        logger.debug("Serializing response: %s", response)
         # Convert any non-serializable objects to strings
         serialized = {}
         for key, value in response.items():
@@ -113,97 +96,172 @@ def serialize_response(response: Dict[str, Any]) -> Dict[str, Any]:
                 ]
             else:
                 serialized[key] = str(value)
-        logger.debug(f"Serialized response: {serialized}")
+        logger.debug("Serialized response: %s", serialized)
         return serialized
     except Exception as e:
         logger.error(f"Error serializing response: {e}", exc_info=True)
         return {"success": False, "error": "Response serialization failed"}
 
+# Build output, VCS metadata and tool directories never hold module poms, so they are not searched
+POM_SEARCH_SKIP_DIRS = frozenset({"target", "build", ".git", ".idea", ".mvn", "node_modules"})
+
 def find_pom_files(project_path: str) -> List[str]:
-    """Find all pom.xml files in the project directory."""
-    logger.debug(f"Searching for pom.xml files in: {project_path}")
+    """Find all pom.xml files in the project directory, skipping POM_SEARCH_SKIP_DIRS."""
+    logger.debug("Searching for pom.xml files in: %s", project_path)
     pom_files = []
-    for root, dirs, files in os.walk(project_path):
-        logger.debug(f"Scanning directory: {root}")
-        if "pom.xml" in files:
-            pom_path = os.path.join(root, "pom.xml")
-            pom_files.append(pom_path)
-            logger.debug(f"Found pom.xml at: {pom_path}")
+    pending = [project_path]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError as e:
+            logger.warning("Cannot scan directory: %s", e)
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in POM_SEARCH_SKIP_DIRS:
+                        pending.append(entry.path)
+                elif entry.name == "pom.xml":
+                    pom_files.append(entry.path)
     
-    logger.info(f"Total pom.xml files found: {len(pom_files)}")
+    logger.info("Total pom.xml files found: %s", len(pom_files))
     return pom_files
 
-def extract_jdk_version(pom_path: str) -> Optional[str]:
-    """Extract JDK version from a pom.xml file."""
-    logger.debug(f"Attempting to extract JDK version from: {pom_path}")
+# lxml parsers can be reused across calls but not shared between threads, so each
+# pom parsing thread gets its own
+_parser_local = threading.local()
+# Pool shared by every analysis for parsing pom.xml files, so concurrent project
+# analyses queue their poms on one bounded set of threads; lxml releases the GIL while parsing
+POM_PARSE_WORKERS = min(16, (os.cpu_count() or 4) + 4)
+POM_PARSE_EXECUTOR = ThreadPoolExecutor(max_workers=POM_PARSE_WORKERS, thread_name_prefix="pom-parse")
+atexit.register(POM_PARSE_EXECUTOR.shutdown, wait=False)
+# Number of projects analyzed concurrently; their poms are parsed on POM_PARSE_EXECUTOR
+PROJECT_ANALYSIS_WORKERS = min(8, os.cpu_count() or 4)
+# Number of parsed pom.xml results kept between analyses
+POM_CACHE_SIZE = 4096
+POM_NAMESPACES = {"mvn": "http://maven.apache.org/POM/4.0.0"}
+
+# Locations checked for the Java version, in order of preference
+JDK_VERSION_XPATHS = [
+    (xpath, ET.XPath(xpath, namespaces=POM_NAMESPACES))
+    for xpath in (
+        ".//mvn:properties/mvn:java.version",
+        ".//mvn:properties/mvn:maven.compiler.source",
+        ".//mvn:build/mvn:plugins//mvn:configuration/mvn:source",
+    )
+]
+PARENT_XPATH = ET.XPath(".//mvn:parent", namespaces=POM_NAMESPACES)
+DEPENDENCIES_XPATH = ET.XPath(".//mvn:dependencies/mvn:dependency", namespaces=POM_NAMESPACES)
+GROUP_ID_XPATH = ET.XPath("mvn:groupId", namespaces=POM_NAMESPACES)
+ARTIFACT_ID_XPATH = ET.XPath("mvn:artifactId", namespaces=POM_NAMESPACES)
+VERSION_XPATH = ET.XPath("mvn:version", namespaces=POM_NAMESPACES)
+
+def get_pom_parser() -> ET.XMLParser:
+    """Return the XMLParser for the calling thread, creating it on first use."""
+    parser = getattr(_parser_local, "parser", None)
+    if parser is None:
+        # Never expand entities or fetch anything: lxml < 5 resolves external entities by
+        # default, which would let a pom pull local files into the results sent to Gemini
+        parser = _parser_local.parser = ET.XMLParser(
+            remove_blank_text=True,
+            huge_tree=False,
+            resolve_entities=False,
+            no_network=True
+        )
+    return parser
+
+def first_match(xpath: ET.XPath, element) -> Optional[Any]:
+    """Return the first element a compiled XPath selects from element, or None."""
+    matches = xpath(element)
+    return matches[0] if matches else None
+
+def extract_jdk_version(root, pom_path: str) -> Optional[str]:
+    """Extract JDK version from the parsed root element of a pom.xml file."""
+    logger.debug("Attempting to extract JDK version from: %s", pom_path)
     try:
-        tree = ET.parse(pom_path)
-        root = tree.getroot()
-        ns = {"mvn": "http://maven.apache.org/POM/4.0.0"}
-        logger.debug("Successfully parsed pom.xml")
-
         # Check various locations for Java version
-        locations = [
-            ".//mvn:properties/mvn:java.version",
-            ".//mvn:properties/mvn:maven.compiler.source",
-            ".//mvn:build/mvn:plugins//mvn:configuration/mvn:source",
-        ]
-
-        for xpath in locations:
-            logger.debug(f"Checking xpath: {xpath}")
-            version_elem = root.find(xpath, ns)
+        for xpath, compiled in JDK_VERSION_XPATHS:
+            logger.debug("Checking xpath: %s", xpath)
+            version_elem = first_match(compiled, root)
             if version_elem is not None and version_elem.text:
                 version = version_elem.text
-                logger.info(f"Found JDK version {version} at xpath {xpath}")
+                logger.info("Found JDK version %s at xpath %s", version, xpath)
                 return version
 
-        logger.warning(f"No JDK version found in {pom_path}")
+        logger.warning("No JDK version found in %s", pom_path)
         return None
     except Exception as e:
-        logger.error(f"Error parsing pom.xml at {pom_path}: {str(e)}", exc_info=True)
+        logger.error("Error extracting JDK version from %s: %s", pom_path, e, exc_info=True)
         return None
 
-def extract_spring_boot_version(pom_path: str) -> Optional[str]:
-    """Extract Spring Boot version from a pom.xml file."""
-    logger.debug(f"Attempting to extract Spring Boot version from: {pom_path}")
+def extract_spring_boot_version(root, pom_path: str) -> Optional[str]:
+    """Extract Spring Boot version from the parsed root element of a pom.xml file."""
+    logger.debug("Attempting to extract Spring Boot version from: %s", pom_path)
     try:
-        tree = ET.parse(pom_path)
-        root = tree.getroot()
-        ns = {"mvn": "http://maven.apache.org/POM/4.0.0"}
-        logger.debug("Successfully parsed pom.xml")
-
         # Check parent version first
-        parent = root.find(".//mvn:parent", ns)
+        parent = first_match(PARENT_XPATH, root)
         if parent is not None:
-            group_id = parent.find("mvn:groupId", ns)
-            artifact_id = parent.find("mvn:artifactId", ns)
-            version = parent.find("mvn:version", ns)
+            group_id = first_match(GROUP_ID_XPATH, parent)
+            artifact_id = first_match(ARTIFACT_ID_XPATH, parent)
+            version = first_match(VERSION_XPATH, parent)
             
             if (group_id is not None and group_id.text == "org.springframework.boot" and 
                 artifact_id is not None and artifact_id.text == "spring-boot-starter-parent" and
                 version is not None):
-                logger.info(f"Found Spring Boot version {version.text} in parent")
+                logger.info("Found Spring Boot version %s in parent", version.text)
                 return version.text
 
         # Check dependencies
-        dependencies = root.findall(".//mvn:dependencies/mvn:dependency", ns)
+        dependencies = DEPENDENCIES_XPATH(root)
         for dep in dependencies:
-            group_id = dep.find("mvn:groupId", ns)
-            artifact_id = dep.find("mvn:artifactId", ns)
-            version = dep.find("mvn:version", ns)
+            group_id = first_match(GROUP_ID_XPATH, dep)
+            artifact_id = first_match(ARTIFACT_ID_XPATH, dep)
+            version = first_match(VERSION_XPATH, dep)
             
             if (group_id is not None and group_id.text == "org.springframework.boot" and
                 artifact_id is not None and "spring-boot" in artifact_id.text and
                 version is not None):
-                logger.info(f"Found Spring Boot version {version.text} in dependencies")
+                logger.info("Found Spring Boot version %s in dependencies", version.text)
                 return version.text
 
-        logger.warning(f"No Spring Boot version found in {pom_path}")
+        logger.warning("No Spring Boot version found in %s", pom_path)
         return None
     except Exception as e:
-        logger.error(f"Error extracting Spring Boot version: {str(e)}", exc_info=True)
+        logger.error("Error extracting Spring Boot version: %s", e, exc_info=True)
         return None
 
+def read_pom_versions(pom_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Parse a pom.xml file once and return its (JDK version, Spring Boot version).
+    Either is None if it is not declared; both are None if the file cannot be parsed.
+    """
+    try:
+        root = ET.parse(pom_path, get_pom_parser()).getroot()
+        logger.debug("Successfully parsed pom.xml")
+    except Exception as e:
+        logger.error("Error parsing pom.xml at %s: %s", pom_path, e, exc_info=True)
+        return None, None
+    return extract_jdk_version(root, pom_path), extract_spring_boot_version(root, pom_path)
+
+@functools.lru_cache(maxsize=POM_CACHE_SIZE)
+def read_pom_versions_cached(pom_path: str, mtime_ns: int, size: int) -> Tuple[Optional[str], Optional[str]]:
+    """read_pom_versions memoized by path, modification time and size; the last two only key the cache."""
+    return read_pom_versions(pom_path)
+
+def get_pom_versions(pom_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Return the (JDK version, Spring Boot version) of a pom.xml file, reusing the
+    result of an earlier parse while the file is unchanged, so repeated
+    analyzeProject calls to the same server only re-parse edited poms.
+    """
+    pom_path = os.path.abspath(pom_path)
+    try:
+        st = os.stat(pom_path)
+    except OSError as e:
+        logger.error("Cannot stat pom.xml at %s: %s", pom_path, e)
+        return None, None
+    return read_pom_versions_cached(pom_path, st.st_mtime_ns, st.st_size)
+
 def analyze_project_impl(project_name: str) -> Dict[str, Any]:
     """
     Analyze a Maven project to identify JDK and Spring Boot versions.
@@ -214,12 +272,12 @@ def analyze_project_impl(project_name: str) -> Dict[str, Any]:
     Returns:
         Dict containing analysis results with JDK and Spring Boot versions
     """
-    logger.info(f"Starting project analysis for: {project_name}")
+    logger.info("Starting project analysis for: %s", project_name)
     
     try:
         project_path = get_full_project_path(project_name)
         if not os.path.exists(project_path):
-            logger.error(f"Project path does not exist: {project_path}")
+            logger.error("Project path does not exist: %s", project_path)
             return {"success": False, "error": "Project path does not exist"}
 
         pom_files = find_pom_files(project_path)
@@ -231,20 +289,21 @@ def analyze_project_impl(project_name: str) -> Dict[str, Any]:
         jdk_versions = set()
         spring_boot_versions = set()
         
-        for pom_file in pom_files:
-            logger.debug(f"Processing pom file: {pom_file}")
+        # Poms are independent, so read and parse them concurrently
+        pom_versions = list(POM_PARSE_EXECUTOR.map(get_pom_versions, pom_files))
+
+        for pom_file, (jdk_version, spring_version) in zip(pom_files, pom_versions):
+            logger.debug("Processing pom file: %s", pom_file)
             
             # Get JDK version
-            jdk_version = extract_jdk_version(pom_file)
             if jdk_version:
                 jdk_versions.add(jdk_version)
-                logger.debug(f"Added JDK version {jdk_version} to versions set")
+                logger.debug("Added JDK version %s to versions set", jdk_version)
             
             # Get Spring Boot version
-            spring_version = extract_spring_boot_version(pom_file)
             if spring_version:
                 spring_boot_versions.add(spring_version)
-                logger.debug(f"Added Spring Boot version {spring_version} to versions set")
+                logger.debug("Added Spring Boot version %s to versions set", spring_version)
 
         # Prepare response
         response = {"success": True}
@@ -253,7 +312,7 @@ def analyze_project_impl(project_name: str) -> Dict[str, Any]:
         if jdk_versions:
             min_jdk = min(jdk_versions)
             response["jdk_version"] = min_jdk
-            logger.info(f"Selected JDK version: {min_jdk}")
+            logger.info("Selected JDK version: %s", min_jdk)
         else:
             logger.warning("No JDK versions found")
             response["jdk_version"] = None
@@ -262,7 +321,7 @@ def analyze_project_impl(project_name: str) -> Dict[str, Any]:
         if spring_boot_versions:
             min_spring = min(spring_boot_versions)
             response["spring_boot_version"] = min_spring
-            logger.info(f"Selected Spring Boot version: {min_spring}")
+            logger.info("Selected Spring Boot version: %s", min_spring)
         else:
             logger.warning("No Spring Boot versions found")
             response["spring_boot_version"] = None
@@ -309,11 +368,12 @@ def analyze_project() -> dict:
             
         logger.info(f"Found projects: {projects}")
         
-        # Analyze each project
+        # Analyze each project; projects are independent, so run them concurrently
+        with ThreadPoolExecutor(max_workers=min(PROJECT_ANALYSIS_WORKERS, len(projects))) as executor:
+            project_results = list(executor.map(analyze_project_impl, projects))
+
         results = []
-        for project_name in projects:
-            logger.info(f"Analyzing project: {project_name}")
-            result = analyze_project_impl(project_name)
+        for project_name, result in zip(projects, project_results):
             if result.get("success", False):
                 result["project_name"] = project_name
                 results.append(result)
@@ -333,7 +393,7 @@ def analyze_project() -> dict:
         }
         
         serialized = serialize_response(combined_result)
-        logger.debug(f"Analysis results after serialization: {serialized}")
+        logger.debug("Analysis results after serialization: %s", serialized)
         
         logger.info("=== Completed analyzeProject ===")
         return serialized
@@ -405,22 +465,70 @@ def score_recipe_match(recipe: Dict, target_version: str, llm: GenerativeModel)
         logger.error(f"Error scoring recipe '{recipe['name']}'", exc_info=True)
         return 0
 
-def find_best_recipe(recipes: List[Dict], target_version: str, llm: GenerativeModel) -> Optional[Dict]:
-    """Find the best matching recipe for the target version."""
+def score_recipe_matches(recipes: List[Dict], target_version: str, llm: GenerativeModel) -> List[float]:
+    """
+    Score how well each recipe matches the migration goal with a single LLM call.
+    Every score in the batch response names the index of its recipe. A response
+    with an unknown or repeated index is discarded as a whole, and recipes left
+    without a score are scored one by one.
+    """
+    logger.debug("Batch scoring %d recipes for Spring Boot %s", len(recipes), target_version)
+    scores: Dict[int, float] = {}
+    try:
+        recipe_lines = "\n".join(f"{idx}\t{recipe['id']}\t{recipe['name']}" for idx, recipe in enumerate(recipes))
+        prompt = f"""As a Java and Spring Boot migration expert, score how well each recipe below matches the migration goal.
+        
+        Migration Goal: Migrate to Spring Boot {target_version}
+        
+        Recipes (index, id and name, tab separated):
+        {recipe_lines}
+        
+        Respond with a JSON array containing one object {{"index": <recipe index>, "score": <number>}} per recipe,
+        where score is a number between 0 and 100 and:
+        - 100 means perfect match (exact match for Spring Boot {target_version} migration)
+        - 75+ means very relevant (mentions Spring Boot upgrade to similar version)
+        - 50+ means somewhat relevant (mentions Spring Boot but different version)
+        - 25+ means slightly relevant (mentions upgrades but not specific to Spring Boot)
+        - 0 means not relevant at all"""
+
+        response = llm.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
+        batch_scores = json.loads(response.text)
+        if not isinstance(batch_scores, list):
+            raise ValueError(f"Expected a JSON array of scores, got: {response.text}")
+        for item in batch_scores:
+            idx = item["index"]
+            if not isinstance(idx, int) or not 0 <= idx < len(recipes) or idx in scores:
+                raise ValueError(f"Unknown or repeated recipe index in batch scores: {idx!r}")
+            scores[idx] = min(max(float(item["score"]), 0), 100)
+    except Exception:
+        logger.error("Error batch scoring recipes", exc_info=True)
+        # Scores that cannot all be tied to their recipes are not trusted at all
+        scores = {}
+
+    if len(scores) < len(recipes):
+        logger.warning("Batch response scored %d of %d recipes, scoring the rest individually", len(scores), len(recipes))
+        for idx, recipe in enumerate(recipes):
+            if idx not in scores:
+                scores[idx] = score_recipe_match(recipe, target_version, llm)
+    for idx, recipe in enumerate(recipes):
+        logger.info("Recipe '%s' received score: %s", recipe["name"], scores[idx])
+    return [scores[idx] for idx in range(len(recipes))]
+
+def find_best_recipe(recipe_index: List[Tuple[Dict, str]], target_version: str, llm: GenerativeModel) -> Optional[Dict]:
+    """Find the best matching recipe for the target version in (recipe, lowercased name) pairs."""
     logger.info(f"Finding best recipe for Spring Boot {target_version}")
     
     # First try exact match
     search_pattern = f"migrate to spring boot {target_version}"
     logger.debug(f"Searching for exact pattern: {search_pattern}")
     
-    exact_matches = [
-        recipe for recipe in recipes
-        if search_pattern.lower() in recipe["name"].lower()
-    ]
-    logger.debug(f"Found {len(exact_matches)} exact matches")
-
-    if exact_matches:
-        match = exact_matches[0]
+    search_pattern_lower = search_pattern.lower()
+    match = next(
+        (recipe for recipe, recipe_name_lower in recipe_index if search_pattern_lower in recipe_name_lower),
+        None
+    )
+
+    if match is not None:
         logger.info(f"Using exact match: {match['name']}")
         return {
             "recipe_id": match["id"],
@@ -441,33 +549,32 @@ def find_best_recipe(recipes: List[Dict], target_version: str, llm: GenerativeMo
     
     logger.debug(f"Generated version patterns: {version_patterns}")
     
-    # Filter recipes that contain "migrate to spring boot" and any version pattern
+    # Filter recipes that contain "migrate to spring boot" and any version pattern,
+    # keeping only those that match the most specific pattern any recipe matches:
+    # when a 3.3 recipe exists, recipes that only match 3 are not worth scoring
     filtered_recipes = []
-    for recipe in recipes:
-        recipe_name_lower = recipe["name"].lower()
+    best_rank = len(version_patterns)
+    for recipe, recipe_name_lower in recipe_index:
         if "migrate to spring boot" in recipe_name_lower:
-            for pattern in version_patterns:
+            for rank, pattern in enumerate(version_patterns[:best_rank + 1]):
                 if pattern in recipe_name_lower:
+                    if rank < best_rank:
+                        best_rank = rank
+                        filtered_recipes = []
                     filtered_recipes.append(recipe)
                     break
 
-    logger.info(f"Found {len(filtered_recipes)} recipes matching version patterns")
+    logger.info("Found %d recipes matching version pattern %s", len(filtered_recipes),
+                version_patterns[best_rank] if filtered_recipes else None)
 
     # If we have filtered recipes, score them
     if filtered_recipes:
         logger.info("Scoring filtered recipes")
-        scored_recipes = []
-        for recipe in filtered_recipes:
-            logger.debug(f"Scoring recipe: {recipe['name']}")
-            score = score_recipe_match(recipe, target_version, llm)
-            scored_recipes.append((recipe, score))
-
-        scored_recipes.sort(key=lambda x: x[1], reverse=True)
-        logger.debug("Recipes sorted by score")
+        scores = score_recipe_matches(filtered_recipes, target_version, llm)
+        # Only the top recipe is used; max keeps the first of equally scored recipes
+        best_match, score = max(zip(filtered_recipes, scores), key=lambda x: x[1])
         
-        if scored_recipes and scored_recipes[0][1] > 70:
-            best_match = scored_recipes[0][0]
-            score = scored_recipes[0][1]
+        if score > 70:
             logger.info(f"Selected best match: {best_match['name']} (score: {score})")
             return {
                 "recipe_id": best_match["id"],
@@ -480,6 +587,23 @@ def find_best_recipe(recipes: List[Dict], target_version: str, llm: GenerativeMo
     logger.info("No suitable matches found")
     return None
 
+@functools.lru_cache(maxsize=4)
+def read_recipes_cached(path: str, mtime_ns: int) -> List[Tuple[Dict, str]]:
+    """
+    Read and decode a recipes file into (recipe, lowercased name) pairs, so name
+    matching does not case-fold every name again on each call. mtime_ns only keys
+    the cache. Callers must not modify the result.
+    """
+    # Decode straight from the mapped file instead of copying it into a bytes object first
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as view:
+            recipes = orjson.loads(view)
+    return [(recipe, recipe["name"].lower()) for recipe in recipes]
+
+def load_recipe_index(path: str) -> List[Tuple[Dict, str]]:
+    """Return the indexed Moderne recipes in a JSON file, decoding it again only after it changes."""
+    return read_recipes_cached(path, os.stat(path).st_mtime_ns)
+
 @mcp.tool(name="migrationPlan", description="Generate migration plan based on Spring Boot version")
 def migration_plan() -> dict:
     """
@@ -508,9 +632,8 @@ def migration_plan() -> dict:
         
         # Load Moderne recipes
         try:
-            with open("C:\\Users\\rajap\\moderne_recipes.json", 'r') as f:
-                recipes = json.load(f)
-            logger.debug(f"Loaded {len(recipes)} recipes")
+            recipe_index = load_recipe_index(MODERNE_RECIPES_PATH)
+            logger.debug(f"Loaded {len(recipe_index)} recipes")
         except Exception as e:
             logger.error("Failed to load recipes file", exc_info=True)
             return {"success": False, "error": f"Could not load recipes: {str(e)}"}
@@ -518,7 +641,7 @@ def migration_plan() -> dict:
         # Determine if updates are needed
             
         logger.info(f"Finding Spring Boot migration recipe for version {latest_spring}")
-        recipe_match = find_best_recipe(recipes, latest_spring, llm)
+        recipe_match = find_best_recipe(recipe_index, latest_spring, llm)
         if recipe_match:
             result = {
                 "success": True,
@@ -1,31 +1,11 @@
 from mcp.server.fastmcp import FastMCP
-import logging
-import logging.handlers
-import sys
 import os
 import json
 from typing import Dict, Any
+from logging_setup import configure_server_logger
 
 # Configure detailed logging
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-
-# Create handlers
-console_handler = logging.StreamHandler(sys.stdout)
-file_handler = logging.handlers.RotatingFileHandler(
-    'maven_op_client.log',
-    maxBytes=10485760,  # 10MB
-    backupCount=5
-)
-
-# Create formatters and add it to handlers
-log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s')
-console_handler.setFormatter(log_format)
-file_handler.setFormatter(log_format)
-
-# Add handlers to the logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+logger = configure_server_logger(__name__, 'maven_op_client.log')
 
 # Initialize MCP client
 logger.info("Initializing Maven Op Client")
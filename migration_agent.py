@@ -16,6 +16,9 @@ logger = logging.getLogger(__name__)
 from google.generativeai import configure, GenerativeModel
 import google.generativeai as genai
 
+# Load environment variables from .env file
+load_dotenv()
+
 # Configure the Gemini API - Replace with your actual API key
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 # os.environ.get("GEMINI_API_KEY", "your-api-key-here")
@@ -24,10 +27,6 @@ model = GenerativeModel("gemini-2.0-flash")
 
 class MavenProjectAnalyzer:
 
-    def __init__(self):
-        # Load environment variables from .env file
-        load_dotenv()
-
     def __init__(self, project_path):
         self.project_path = project_path
         self.java_version = None
@@ -3,6 +3,7 @@ import json
 import xml.etree.ElementTree as ET
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from fastmcp import FastMCP, Tool, Message
 import google.generativeai as genai
@@ -12,6 +13,9 @@ from google.generativeai import GenerativeModel
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent Gemini scoring calls, to stay within the API rate limits
+RECIPE_SCORING_WORKERS = 4
+
 class MigrationAgentV2:
     def __init__(self):
         load_dotenv()
@@ -23,6 +27,11 @@ class MigrationAgentV2:
         GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
         genai.configure(api_key=GEMINI_API_KEY)
         self.llm = GenerativeModel("gemini-2.0-flash")
+        # proceed/abort step validation is a one-word decision, so a lighter model is enough
+        self.validation_llm = GenerativeModel(
+            "gemini-2.0-flash-lite",
+            generation_config={"max_output_tokens": 5}
+        )
         
         self.response = {
             "jdk_version_used": "",
@@ -194,10 +203,11 @@ class MigrationAgentV2:
 
             # If no direct match, score all recipes
             logger.info("No direct match found, scoring recipes...")
-            scored_recipes = []
-            for recipe in recipes:
-                score = self._score_recipe_match(recipe, migration_goal)
-                scored_recipes.append((recipe, score))
+            # Each score is an independent LLM round-trip, so run them concurrently
+            with ThreadPoolExecutor(max_workers=RECIPE_SCORING_WORKERS) as executor:
+                scores = list(executor.map(lambda recipe: self._score_recipe_match(recipe, migration_goal), recipes))
+            scored_recipes = list(zip(recipes, scores))
+            for recipe, score in scored_recipes:
                 logger.info(f"Recipe '{recipe['name']}' scored {score}")
 
             # Sort by score and get the best match
@@ -222,7 +232,7 @@ class MigrationAgentV2:
             
             Respond with EXACTLY 'proceed' or 'abort', nothing else."""
 
-            response = self.llm.generate_content(prompt)
+            response = self.validation_llm.generate_content(prompt)
             decision = response.text.strip().lower()
             logger.info(f"LLM validation for {step_name}: {decision}")
             return decision == "proceed"
@@ -1,35 +1,15 @@
 from mcp.server.fastmcp import FastMCP
 import subprocess
-import logging
-import logging.handlers
 import os
-import sys
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
+from logging_setup import configure_server_logger
 
 # Load environment variables
 load_dotenv()
 
 # Configure detailed logging
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-
-# Create handlers
-console_handler = logging.StreamHandler(sys.stdout)
-file_handler = logging.handlers.RotatingFileHandler(
-    'moderne_mcp.log',
-    maxBytes=10485760,  # 10MB
-    backupCount=5
-)
-
-# Create formatters and add it to handlers
-log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s')
-console_handler.setFormatter(log_format)
-file_handler.setFormatter(log_format)
-
-# Add handlers to the logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+logger = configure_server_logger(__name__, 'moderne_mcp.log')
 
 # Constants
 MODERNE_CLI_JAR = "C:\\Users\\rajap\\tools\\moderne-cli-3.36.1.jar"
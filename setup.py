@@ -6,7 +6,9 @@ setup(
     packages=find_packages(),
     install_requires=[
         "requests>=2.31.0",
-        "google-generativeai>=0.3.1"
+        "google-generativeai>=0.7.2",
+        "orjson>=3.9.0",
+        "lxml>=4.9.0"
     ],
     entry_points={
         "console_scripts": [